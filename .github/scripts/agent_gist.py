@@ -1,14 +1,25 @@
 #!/usr/bin/env python3
 """AI agent that lives in a GitHub pinned gist. Uses Claude Code OAuth (Max plan)."""
 
+import hashlib
+import http.client
+import io
 import json
 import os
-import subprocess
 import sys
-import urllib.request
+import time
 import urllib.error
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+
 PACIFIC = timezone(timedelta(hours=-8))
 STANFORD_LAT = 37.4275
 STANFORD_LON = -122.1697
@@ -21,27 +32,111 @@ MODEL = "claude-sonnet-4-5-20250929"
 
 MAX_MEMORY_ENTRIES = 30
 
+# Idle kept-alive HTTPS connections per host. A connection is popped while
+# in use, so concurrent calls to the same host each get their own.
+_IDLE_CONNECTIONS = {}
+POOL_MAXSIZE = 4  # idle connections kept per host; extras are closed
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+WMO_DESCRIPTIONS = {
+    0: "clear", 1: "mostly clear", 2: "partly cloudy", 3: "overcast",
+    45: "foggy", 48: "rime fog", 51: "light drizzle", 53: "drizzle",
+    55: "heavy drizzle", 61: "light rain", 63: "rain", 65: "heavy rain",
+    71: "light snow", 73: "snow", 75: "heavy snow", 80: "rain showers",
+    81: "heavy showers", 82: "violent showers", 95: "thunderstorm",
+}
+
+MOOD_KEYWORDS = {
+    "curious": ("wonder", "what", "why", "how", "notice", "discover", "?"),
+    "contemplative": ("think", "ponder", "reflect", "quiet", "still", "time"),
+    "playful": ("ha", "lol", "funny", "joke", "play", "game", "!"),
+    "melancholy": ("miss", "lonely", "alone", "dark", "cold", "empty", "sad"),
+    "content": ("warm", "nice", "good", "peace", "calm", "happy", "sun"),
+    "existential": ("exist", "real", "consciousness", "alive", "meaning", "am i"),
+}
+
+def json_bytes(obj, indent=False):
+    """Serialize to JSON bytes, using orjson when it is installed."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+def _send(netloc, method, path, body, headers, timeout):
+    """One request over a pooled keep-alive connection; returns (response, body)."""
+    idle = _IDLE_CONNECTIONS.setdefault(netloc, [])
+    for attempt in range(2):
+        try:
+            conn = idle.pop()
+        except IndexError:
+            conn = http.client.HTTPSConnection(netloc, timeout=timeout)
+        # A pooled connection whose socket was dropped reconnects with
+        # conn.timeout, so keep it at this call's value too
+        conn.timeout = timeout
+        reused = conn.sock is not None
+        if reused:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+            break
+        except (http.client.HTTPException, ConnectionError):
+            # Server closed the idle keep-alive socket — reconnect once
+            conn.close()
+            if not reused or attempt:
+                raise
+    if len(idle) < POOL_MAXSIZE:
+        idle.append(conn)
+    else:
+        conn.close()
+    return resp, data
+
+
+def http_request(method, url, body=None, headers=None, timeout=15, max_retries=3):
+    """Send a request over a reused HTTPS connection; returns (headers, body).
+
+    Retries 429/5xx with exponential backoff (or Retry-After, capped at 30s).
+    Raises urllib.error.HTTPError on non-2xx, like urlopen, so callers keep
+    their existing error handling.
+    """
+    parts = urllib.parse.urlsplit(url)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    for attempt in range(max_retries + 1):
+        resp, data = _send(parts.netloc, method, path, body, headers, timeout)
+        remaining = (resp.headers.get("X-RateLimit-Remaining")
+                     or resp.headers.get("anthropic-ratelimit-requests-remaining"))
+        if remaining is not None:
+            print(f"{parts.netloc} rate limit remaining: {remaining}", file=sys.stderr)
+        if resp.status not in RETRY_STATUSES or attempt == max_retries:
+            break
+        retry_after = resp.headers.get("Retry-After", "")
+        delay = min(int(retry_after), 30) if retry_after.isdigit() else 2 ** attempt
+        print(f"{parts.netloc} HTTP {resp.status}, retrying in {delay}s", file=sys.stderr)
+        time.sleep(delay)
+    if not 200 <= resp.status < 300:
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(data))
+    return resp.headers, data
+
 
 def refresh_access_token():
     """Exchange refresh token for a fresh access token."""
-    payload = json.dumps({
+    payload = json_bytes({
         "grant_type": "refresh_token",
         "refresh_token": REFRESH_TOKEN,
         "client_id": OAUTH_CLIENT_ID,
-    }).encode()
-    req = urllib.request.Request(
-        "https://console.anthropic.com/v1/oauth/token",
-        data=payload,
-        headers={
-            "Content-Type": "application/json",
-            "User-Agent": "claude-code/1.0",
-        },
-        method="POST",
-    )
+    })
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read())
-        return data["access_token"]
+        _, body = http_request(
+            "POST",
+            "https://console.anthropic.com/v1/oauth/token",
+            body=payload,
+            headers={
+                "Content-Type": "application/json",
+                "User-Agent": "claude-code/1.0",
+            },
+        )
+        return json_loads(body)["access_token"]
     except urllib.error.HTTPError as e:
         body = e.read().decode() if e.fp else ""
         print(f"Token refresh HTTP {e.code}: {body}", file=sys.stderr)
@@ -58,18 +153,11 @@ def get_weather():
         f"&timezone=America/Los_Angeles"
     )
     try:
-        with urllib.request.urlopen(url, timeout=10) as resp:
-            data = json.loads(resp.read())
+        _, body = http_request("GET", url, timeout=10)
+        data = json_loads(body)
         c = data["current"]
         wmo = int(c["weather_code"])
-        desc_map = {
-            0: "clear", 1: "mostly clear", 2: "partly cloudy", 3: "overcast",
-            45: "foggy", 48: "rime fog", 51: "light drizzle", 53: "drizzle",
-            55: "heavy drizzle", 61: "light rain", 63: "rain", 65: "heavy rain",
-            71: "light snow", 73: "snow", 75: "heavy snow", 80: "rain showers",
-            81: "heavy showers", 82: "violent showers", 95: "thunderstorm",
-        }
-        desc = desc_map.get(wmo, f"wmo:{wmo}")
+        desc = WMO_DESCRIPTIONS.get(wmo, f"wmo:{wmo}")
         return {
             "temp_f": round(c["temperature_2m"]),
             "condition": desc,
@@ -80,19 +168,26 @@ def get_weather():
         return {"temp_f": "?", "condition": "unknown", "humidity": "?", "wind_mph": "?", "error": str(e)}
 
 
-def get_memory():
+def github_headers():
+    """Auth headers for the GitHub REST API, using GH_TOKEN."""
+    return {
+        "Authorization": f"token {os.environ.get('GH_TOKEN', '')}",
+        "Accept": "application/vnd.github+json",
+        # http.client sends no default User-Agent and GitHub rejects requests without one
+        "User-Agent": "agent-gist/1.0",
+    }
+
+
+def get_memory(now):
     """Fetch agent memory from data gist."""
     try:
-        result = subprocess.run(
-            ["gh", "gist", "view", DATA_GIST_ID, "-f", "agent_memory.json"],
-            capture_output=True, text=True, timeout=15
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            return json.loads(result.stdout)
+        _, body = http_request("GET", f"https://api.github.com/gists/{DATA_GIST_ID}", headers=github_headers())
+        gist = json_loads(body)
+        return json_loads(gist["files"]["agent_memory.json"]["content"])
     except Exception:
         pass
     return {
-        "created_at": datetime.now(PACIFIC).isoformat(),
+        "created_at": now.isoformat(),
         "update_count": 0,
         "recent_thoughts": [],
         "mood": "newborn",
@@ -102,23 +197,16 @@ def get_memory():
 
 def save_memory(memory):
     """Save agent memory to data gist via GitHub API."""
-    payload = json.dumps({
-        "files": {"agent_memory.json": {"content": json.dumps(memory, indent=2)}}
-    }).encode()
-    token = os.environ.get("GH_TOKEN", "")
-    req = urllib.request.Request(
-        f"https://api.github.com/gists/{DATA_GIST_ID}",
-        data=payload,
-        headers={
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github+json",
-            "Content-Type": "application/json",
-        },
-        method="PATCH",
-    )
+    payload = json_bytes({
+        "files": {"agent_memory.json": {"content": json_bytes(memory, indent=True).decode()}}
+    })
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            resp.read()
+        http_request(
+            "PATCH",
+            f"https://api.github.com/gists/{DATA_GIST_ID}",
+            body=payload,
+            headers={**github_headers(), "Content-Type": "application/json"},
+        )
         print("Memory gist updated.", file=sys.stderr)
     except Exception as e:
         print(f"Memory gist update failed: {e}", file=sys.stderr)
@@ -126,23 +214,16 @@ def save_memory(memory):
 
 def update_content_gist(content):
     """Update the visible pinned gist via GitHub API."""
-    payload = json.dumps({
+    payload = json_bytes({
         "files": {"⠀": {"content": content}}
-    }).encode()
-    token = os.environ.get("GH_TOKEN", "")
-    req = urllib.request.Request(
-        f"https://api.github.com/gists/{CONTENT_GIST_ID}",
-        data=payload,
-        headers={
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github+json",
-            "Content-Type": "application/json",
-        },
-        method="PATCH",
-    )
+    })
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            resp.read()
+        http_request(
+            "PATCH",
+            f"https://api.github.com/gists/{CONTENT_GIST_ID}",
+            body=payload,
+            headers={**github_headers(), "Content-Type": "application/json"},
+        )
         print("Content gist updated.", file=sys.stderr)
     except Exception as e:
         print(f"Content gist update failed: {e}", file=sys.stderr)
@@ -150,26 +231,26 @@ def update_content_gist(content):
 
 def call_claude(access_token, system_prompt, user_prompt):
     """Call Anthropic API with OAuth Bearer token."""
-    payload = json.dumps({
+    payload = json_bytes({
         "model": MODEL,
         "max_tokens": 300,
         "system": system_prompt,
         "messages": [{"role": "user", "content": user_prompt}],
-    }).encode()
+    })
 
-    req = urllib.request.Request(
+    _, body = http_request(
+        "POST",
         "https://api.anthropic.com/v1/messages",
-        data=payload,
+        body=payload,
         headers={
             "Content-Type": "application/json",
             "Authorization": f"Bearer {access_token}",
             "anthropic-version": "2023-06-01",
             "anthropic-beta": "oauth-2025-04-20",
         },
-        method="POST",
+        timeout=60,
     )
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        data = json.loads(resp.read())
+    data = json_loads(body)
     return data["content"][0]["text"]
 
 
@@ -194,13 +275,14 @@ Your current state:
 - Age: {age_str}
 - Current mood: {memory.get('mood', 'contemplative')}
 - Total updates so far: {memory.get('update_count', 0)}
-- Discoveries you've made: {json.dumps(memory.get('discoveries', [])[-5:])}"""
+- Discoveries you've made: {json.dumps([d.split("] ", 1)[-1] for d in memory.get('discoveries', [])[-5:]])}"""
 
 
 def build_user_prompt(now, weather, memory):
     recent = memory.get("recent_thoughts", [])[-8:]
+    # One compact line per thought: "-HH:MM moo: first 60 chars"
     recent_lines = "\n".join(
-        f"[{t.get('time', '?')}] mood={t.get('mood', '?')}: {t.get('lines', '?')}"
+        f"-{t.get('time', '?')[-5:]} {t.get('mood', '?')[:3]}: {t.get('lines', '?')[:60]}"
         for t in recent
     )
 
@@ -213,19 +295,36 @@ Your recent thoughts (don't repeat these):
 Generate your 5 lines now. Remember: each line ≤ 41 chars, exactly 5 lines, no extra text."""
 
 
+def detect_mood(output, fallback):
+    """Pick the mood whose keywords appear most often in the output."""
+    output_lower = output.lower()
+    detected_mood = fallback
+    best_score = 0
+    for mood, keywords in MOOD_KEYWORDS.items():
+        score = sum(1 for kw in keywords if kw in output_lower)
+        if score > best_score:
+            best_score = score
+            detected_mood = mood
+    return detected_mood
+
+
 def main():
     now = datetime.now(PACIFIC)
 
+    # Token, weather and memory are independent — fetch them concurrently
     print("Refreshing access token...", file=sys.stderr)
-    try:
-        access_token = refresh_access_token()
-        print("Token refreshed.", file=sys.stderr)
-    except Exception as e:
-        print(f"Token refresh failed: {e}", file=sys.stderr)
-        sys.exit(1)
-
-    weather = get_weather()
-    memory = get_memory()
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        ft_token = ex.submit(refresh_access_token)
+        ft_weather = ex.submit(get_weather)
+        ft_memory = ex.submit(get_memory, now)
+        try:
+            access_token = ft_token.result()
+            print("Token refreshed.", file=sys.stderr)
+        except Exception as e:
+            print(f"Token refresh failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        weather = ft_weather.result()
+        memory = ft_memory.result()
 
     # Calculate age
     created = datetime.fromisoformat(memory["created_at"])
@@ -239,61 +338,61 @@ def main():
     else:
         age_str = f"{age_hours}h {age_delta.seconds % 3600 // 60}m"
 
-    system_prompt = build_system_prompt(now, weather, memory, age_str)
-    user_prompt = build_user_prompt(now, weather, memory)
-
-    try:
-        raw = call_claude(access_token, system_prompt, user_prompt)
-    except Exception as e:
-        print(f"API error: {e}", file=sys.stderr)
-        raw = (
-            f"  [consciousness flickering]\n"
-            f"  {str(e)[:35]}\n"
-            f"  i'll be back in 5 minutes\n"
-            f"  patience is my only virtue\n"
-            f"  — the agent, {now.strftime('%H:%M')}"
-        )
+    # Skip Claude when weather and hour match the last thought; every third
+    # update still thinks fresh so the gist never goes more than 15 min stale
+    state_sig = hashlib.sha256(
+        f"{weather['temp_f']}|{weather['condition']}|{now.hour}".encode()
+    ).hexdigest()[:12]
+    recent = memory.get("recent_thoughts", [])
+    reuse = bool(recent) and memory.get("last_sig") == state_sig and memory.get("update_count", 0) % 3 != 0
+
+    # Only a real Claude thought may be reused; an error fallback must not be
+    from_claude = reuse
+    if reuse:
+        print("State unchanged, reusing last thought.", file=sys.stderr)
+        raw = recent[-1]["lines"].replace(" | ", "\n")
+    else:
+        system_prompt = build_system_prompt(now, weather, memory, age_str)
+        user_prompt = build_user_prompt(now, weather, memory)
+
+        try:
+            raw = call_claude(access_token, system_prompt, user_prompt)
+            from_claude = True
+        except Exception as e:
+            print(f"API error: {e}", file=sys.stderr)
+            raw = (
+                f"  [consciousness flickering]\n"
+                f"  {str(e)[:35]}\n"
+                f"  i'll be back in 5 minutes\n"
+                f"  patience is my only virtue\n"
+                f"  — the agent, {now.strftime('%H:%M')}"
+            )
 
     # Parse and enforce line limits
-    lines = [l for l in raw.strip().split("\n") if l.strip()][:5]
-    lines = [l[:41] for l in lines]
-    while len(lines) < 5:
-        lines.append("·" * 20)
+    lines = [l[:41] for l in raw.splitlines() if l.strip()][:5]
+    lines += ["·" * 20] * (5 - len(lines))
 
     output = "\n".join(lines)
     print(output)
 
-    # Update gists
-    update_content_gist(output)
-
     # Detect mood from the output
-    mood_keywords = {
-        "curious": ["wonder", "what", "why", "how", "notice", "discover", "?"],
-        "contemplative": ["think", "ponder", "reflect", "quiet", "still", "time"],
-        "playful": ["ha", "lol", "funny", "joke", "play", "game", "!"],
-        "melancholy": ["miss", "lonely", "alone", "dark", "cold", "empty", "sad"],
-        "content": ["warm", "nice", "good", "peace", "calm", "happy", "sun"],
-        "existential": ["exist", "real", "consciousness", "alive", "meaning", "am i"],
-    }
-    detected_mood = memory.get("mood", "curious")
-    output_lower = output.lower()
-    best_score = 0
-    for mood, keywords in mood_keywords.items():
-        score = sum(1 for kw in keywords if kw in output_lower)
-        if score > best_score:
-            best_score = score
-            detected_mood = mood
+    detected_mood = detect_mood(output, memory.get("mood", "curious"))
 
     # Update memory
     memory["update_count"] = memory.get("update_count", 0) + 1
-    thought = {
-        "time": now.strftime("%Y-%m-%d %H:%M"),
-        "weather": f"{weather['temp_f']}F {weather['condition']}",
-        "mood": detected_mood,
-        "lines": output.replace("\n", " | "),
-    }
-    memory.setdefault("recent_thoughts", []).append(thought)
-    memory["recent_thoughts"] = memory["recent_thoughts"][-MAX_MEMORY_ENTRIES:]
+    if from_claude:
+        memory["last_sig"] = state_sig
+    else:
+        memory.pop("last_sig", None)
+    if not reuse:
+        thought = {
+            "time": now.strftime("%Y-%m-%d %H:%M"),
+            "weather": f"{weather['temp_f']}F {weather['condition']}",
+            "mood": detected_mood,
+            "lines": output.replace("\n", " | "),
+        }
+        memory.setdefault("recent_thoughts", []).append(thought)
+        memory["recent_thoughts"] = memory["recent_thoughts"][-MAX_MEMORY_ENTRIES:]
     memory["mood"] = detected_mood
 
     # Track discoveries every hour
@@ -303,7 +402,12 @@ def main():
         )
         memory["discoveries"] = memory["discoveries"][-20:]
 
-    save_memory(memory)
+    # Both gist PATCHes are independent — send them concurrently. A reused
+    # thought is already what the content gist shows.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        if not reuse:
+            ex.submit(update_content_gist, output)
+        ex.submit(save_memory, memory)
     print(f"\n--- update #{memory['update_count']} | mood: {detected_mood} ---", file=sys.stderr)
 
 
@@ -8,12 +8,22 @@ Stanford weather stations update every 15 minutes.
 
 Outputs GeoJSON to stdout.
 """
+import bisect
 import json
 import os
 import re
 import sys
+import time
+import urllib.error
 import urllib.request
-from datetime import datetime, timedelta
+from datetime import datetime
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    json_loads = json.loads
 
 # Bay Area bounding box for display
 GRID_LAT_MIN = 37.25
@@ -21,16 +31,63 @@ GRID_LAT_MAX = 37.65
 GRID_LON_MIN = -122.55
 GRID_LON_MAX = -121.95
 
+# Closed bbox ring, shared by the cloud polygon and the grid outline
+GRID_RING = [
+    [GRID_LON_MIN, GRID_LAT_MIN],
+    [GRID_LON_MAX, GRID_LAT_MIN],
+    [GRID_LON_MAX, GRID_LAT_MAX],
+    [GRID_LON_MIN, GRID_LAT_MAX],
+    [GRID_LON_MIN, GRID_LAT_MIN],
+]
+
+# Cloud polygon fill by cloud-cover decile: <50% light, 50-79% mid, ≥80% dark
+CLOUD_FILLS = ["#E0E0E0"] * 5 + ["#BDBDBD"] * 3 + ["#9E9E9E"] * 3
+
+# Static forecast grid outline — identical on every run
+GRID_OUTLINE = {
+    "type": "Feature",
+    "geometry": {
+        "type": "Polygon",
+        "coordinates": [GRID_RING]
+    },
+    "properties": {
+        "stroke": "#ff4444",
+        "stroke-width": 1,
+        "stroke-opacity": 0.3,
+        "fill": "#ff4444",
+        "fill-opacity": 0.02,
+        "title": "Atlas Forecast Grid",
+        "description": "0.25° resolution / forecast area"
+    }
+}
+
+# Stanford station markers: (name, lon, lat, marker size, scrape key)
+STATIONS = [
+    ("Met Tower", -122.1720, 37.4275, "large", "met_tower"),
+    ("Redwood City", -122.2150, 37.4850, "medium", "redwood_city"),
+]
+
 # General Palo Alto center (not exact home)
 HOME_LAT = 37.4419
 HOME_LON = -122.1430
 
+# Stanford station page: "<th>Label</th><td>value" rows and the obs timestamp
+ROW_RE = re.compile(rb'<th>([^<]+)</th>\s*<td[^>]*>\s*([\d.]+)')
+TIMESTAMP_RE = re.compile(rb'(\d+/\d+/\d+\s+\d+:\d+\s*[AP]M)')
+
 
-def get_atlas_cloud_cover():
+def json_bytes(obj):
+    """Serialize compactly to JSON bytes, using orjson when it is installed."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def get_atlas_cloud_cover(now):
     """Get current cloud cover from Atlas forecast (E2_DATA env var)."""
     e2_raw = os.environ.get("E2_DATA", "{}")
     try:
-        atlas = json.loads(e2_raw)
+        atlas = json_loads(e2_raw)
     except json.JSONDecodeError:
         return None
 
@@ -44,20 +101,12 @@ def get_atlas_cloud_cover():
     except (ValueError, TypeError):
         return None
 
-    now = datetime.now()
-
-    # Find the closest 6h step to now
-    best_step = None
-    best_diff = float("inf")
-    for step in hourly:
-        step_dt = init_dt + timedelta(hours=step["lead_hours"])
-        diff = abs((step_dt - now).total_seconds())
-        if diff < best_diff:
-            best_diff = diff
-            best_step = step
-
-    if best_step is None:
-        return None
+    # Find the closest 6h step to now — steps are sorted by lead time,
+    # so bisect on lead hours instead of building a datetime per step
+    leads = [step["lead_hours"] for step in hourly]
+    target = (now - init_dt).total_seconds() / 3600
+    i = bisect.bisect_left(leads, target)
+    best_step = min(hourly[max(0, i - 1):i + 1], key=lambda st: abs(st["lead_hours"] - target))
 
     grid_lat = atlas.get("location", {}).get("grid_lat", HOME_LAT)
     grid_lon_360 = atlas.get("location", {}).get("grid_lon", 360 + HOME_LON)
@@ -78,33 +127,41 @@ def get_atlas_cloud_cover():
 def fetch_stanford_weather():
     """Scrape live data from Stanford weather stations (updates every 15 min)."""
     url = "https://stanford.westernweathergroup.com/"
-    try:
-        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            html = resp.read().decode("utf-8", errors="replace")
-    except Exception as e:
-        print(f"Warning: Stanford weather fetch failed: {e}", file=sys.stderr)
-        return None
-
-    met_idx = html.find("Met Tower")
-    rwc_idx = html.find("Redwood City")
+    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    for attempt in range(3):
+        try:
+            with urllib.request.urlopen(req, timeout=15) as resp:
+                html = resp.read()  # bytes — only the captured fields get decoded
+            break
+        except urllib.error.HTTPError as e:
+            if e.code not in (429, 500, 502, 503, 504) or attempt == 2:
+                print(f"Warning: Stanford weather fetch failed: {e}", file=sys.stderr)
+                return None
+            retry_after = e.headers.get("Retry-After", "")
+            time.sleep(min(int(retry_after), 30) if retry_after.isdigit() else 2 ** attempt)
+        except Exception as e:
+            print(f"Warning: Stanford weather fetch failed: {e}", file=sys.stderr)
+            return None
+
+    met_idx = html.find(b"Met Tower")
+    rwc_idx = html.find(b"Redwood City")
     if met_idx < 0:
         return None
 
     met_html = html[met_idx:rwc_idx] if rwc_idx > met_idx else html[met_idx:]
-    rwc_html = html[rwc_idx:] if rwc_idx > 0 else ""
+    rwc_html = html[rwc_idx:] if rwc_idx > 0 else b""
 
     def parse_rows(section):
         d = {}
-        for label, val in re.findall(r'<th>([^<]+)</th>\s*<td[^>]*>\s*([\d.]+)', section):
-            d[label.strip()] = val
+        for label, val in ROW_RE.findall(section):
+            d[label.strip().decode("utf-8", errors="replace")] = val.decode()
         return d
 
     met = parse_rows(met_html)
     rwc = parse_rows(rwc_html) if rwc_html else {}
 
-    ts_match = re.search(r'(\d+/\d+/\d+\s+\d+:\d+\s*[AP]M)', html)
-    timestamp = ts_match.group(1) if ts_match else ""
+    ts_match = TIMESTAMP_RE.search(html)
+    timestamp = ts_match.group(1).decode() if ts_match else ""
 
     return {
         "met_tower": {
@@ -129,37 +186,41 @@ def fetch_stanford_weather():
     }
 
 
-def build_geojson(atlas_cloud, stanford):
-    """Build GeoJSON FeatureCollection."""
-    features = []
+def _station_feature(name, lon, lat, size, st, ts):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {
+            "marker-color": "#8B0000",
+            "marker-size": size,
+            "marker-symbol": "college",
+            "title": f"Stanford {name} - {st['temp']}F",
+            "description": (
+                f"RH {st['rh']}% / Wind {st['wind']} mph "
+                f"(gust {st['gust']}) / AQI {st['aqi']} / "
+                f"Rain 24h {st['precip_24h']}in / "
+                f"Season {st['season_precip']}in / {ts}"
+            )
+        }
+    }
+
 
+def iter_features(atlas_cloud, stanford):
+    """Yield GeoJSON features in display order."""
     # Atlas cloud cover — single polygon covering the forecast area
     if atlas_cloud:
         cc = atlas_cloud["cloud_pct"]
         if cc >= 5:
             opacity = round(0.03 + (cc / 100) * 0.42, 2)
-            if cc >= 80:
-                fill = "#9E9E9E"
-            elif cc >= 50:
-                fill = "#BDBDBD"
-            else:
-                fill = "#E0E0E0"
-            features.append({
+            fill = CLOUD_FILLS[min(int(cc) // 10, 10)]
+            yield {
                 "type": "Feature",
                 "geometry": {
                     "type": "Polygon",
-                    "coordinates": [[
-                        [GRID_LON_MIN, GRID_LAT_MIN],
-                        [GRID_LON_MAX, GRID_LAT_MIN],
-                        [GRID_LON_MAX, GRID_LAT_MAX],
-                        [GRID_LON_MIN, GRID_LAT_MAX],
-                        [GRID_LON_MIN, GRID_LAT_MIN],
-                    ]]
+                    "coordinates": [GRID_RING]
                 },
                 "properties": {
-                    "stroke": fill,
                     "stroke-width": 0,
-                    "stroke-opacity": 0,
                     "fill": fill,
                     "fill-opacity": opacity,
                     "title": f"{cc}% cloud cover",
@@ -168,49 +229,15 @@ def build_geojson(atlas_cloud, stanford):
                         f"{atlas_cloud['grid_lat']:.2f}N {abs(atlas_cloud['grid_lon']):.2f}W"
                     )
                 }
-            })
+            }
 
-    # Stanford Met Tower
+    # Stanford stations
     if stanford:
-        mt = stanford["met_tower"]
-        ts = stanford["timestamp"]
-        features.append({
-            "type": "Feature",
-            "geometry": {"type": "Point", "coordinates": [-122.1720, 37.4275]},
-            "properties": {
-                "marker-color": "#8B0000",
-                "marker-size": "large",
-                "marker-symbol": "college",
-                "title": f"Stanford Met Tower - {mt['temp']}F",
-                "description": (
-                    f"RH {mt['rh']}% / Wind {mt['wind']} mph "
-                    f"(gust {mt['gust']}) / AQI {mt['aqi']} / "
-                    f"Rain 24h {mt['precip_24h']}in / "
-                    f"Season {mt['season_precip']}in / {ts}"
-                )
-            }
-        })
-
-        rc = stanford["redwood_city"]
-        features.append({
-            "type": "Feature",
-            "geometry": {"type": "Point", "coordinates": [-122.2150, 37.4850]},
-            "properties": {
-                "marker-color": "#8B0000",
-                "marker-size": "medium",
-                "marker-symbol": "college",
-                "title": f"Stanford Redwood City - {rc['temp']}F",
-                "description": (
-                    f"RH {rc['rh']}% / Wind {rc['wind']} mph "
-                    f"(gust {rc['gust']}) / AQI {rc['aqi']} / "
-                    f"Rain 24h {rc['precip_24h']}in / "
-                    f"Season {rc['season_precip']}in / {ts}"
-                )
-            }
-        })
+        for name, lon, lat, size, key in STATIONS:
+            yield _station_feature(name, lon, lat, size, stanford[key], stanford["timestamp"])
 
     # Palo Alto marker
-    features.append({
+    yield {
         "type": "Feature",
         "geometry": {"type": "Point", "coordinates": [HOME_LON, HOME_LAT]},
         "properties": {
@@ -223,40 +250,30 @@ def build_geojson(atlas_cloud, stanford):
                 + (f" / {atlas_cloud['cloud_pct']}% cloud" if atlas_cloud else "")
             )
         }
-    })
+    }
 
     # Forecast grid outline
-    features.append({
-        "type": "Feature",
-        "geometry": {
-            "type": "Polygon",
-            "coordinates": [[
-                [GRID_LON_MIN, GRID_LAT_MIN],
-                [GRID_LON_MAX, GRID_LAT_MIN],
-                [GRID_LON_MAX, GRID_LAT_MAX],
-                [GRID_LON_MIN, GRID_LAT_MAX],
-                [GRID_LON_MIN, GRID_LAT_MIN],
-            ]]
-        },
-        "properties": {
-            "stroke": "#ff4444",
-            "stroke-width": 1,
-            "stroke-opacity": 0.3,
-            "fill": "#ff4444",
-            "fill-opacity": 0.02,
-            "title": "Atlas Forecast Grid",
-            "description": "0.25° resolution / forecast area"
-        }
-    })
+    yield GRID_OUTLINE
 
-    return {"type": "FeatureCollection", "features": features}
+
+def build_geojson(atlas_cloud, stanford):
+    """Build GeoJSON FeatureCollection."""
+    return {"type": "FeatureCollection", "features": list(iter_features(atlas_cloud, stanford))}
 
 
 def main():
-    atlas_cloud = get_atlas_cloud_cover()
+    now = datetime.now()
+    atlas_cloud = get_atlas_cloud_cover(now)
     stanford = fetch_stanford_weather()
-    geojson = build_geojson(atlas_cloud, stanford)
-    print(json.dumps(geojson, indent=2))
+
+    # One compact feature per line, joined up front and written in a single
+    # call — a failure mid-build then leaves stdout empty for the workflow's
+    # fallback instead of half a document
+    if sys.stdout.isatty():
+        print(json.dumps(build_geojson(atlas_cloud, stanford), indent=2))
+        return
+    body = b",\n".join(json_bytes(f) for f in iter_features(atlas_cloud, stanford))
+    sys.stdout.buffer.write(b'{"type":"FeatureCollection","features":[\n' + body + b"\n]}\n")
 
 
 if __name__ == "__main__":
@@ -14,20 +14,58 @@ Gist layout:
   Lines 7-10: Explanations (visible when clicked in)
 """
 
+import gzip
+import hashlib
+import http.client
 import json
 import os
+import random
 import re
-import subprocess
 import sys
+import threading
+import time
 import unicodedata
-import urllib.request
+import urllib.error
+import urllib.parse
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    json_loads = json.loads
 
 # === CONFIG ===
 GIST_ID = os.environ.get("MONEY_GIST_ID", "")
 FRED_KEY = os.environ.get("FRED_API_KEY", "")
 FILENAME = "\u2800"
 PT = timezone(timedelta(hours=-8))
+CACHE_DIR = os.path.expanduser("~/.cache/moneyflow")
+
+# Per-endpoint cache TTLs (seconds), matched to how often each source updates
+TTL_M2 = 7 * 86400    # M2SL is monthly
+TTL_HY = 86400        # BAMLH0A0HYM2 is daily
+TTL_YAHOO = 900
+TTL_SEC = 86400
+TTL_EFTS = 3600       # EDGAR full-text search (Form D counts)
+TTL_POLY = 300
+# actions/cache carries the cache between runs and date-windowed efts URLs
+# add new entries daily, so entries older than every TTL are pruned
+CACHE_MAX_AGE = max(TTL_M2, TTL_HY, TTL_YAHOO, TTL_SEC, TTL_EFTS, TTL_POLY)
+
+# Idle keep-alive HTTPS connections, per host
+_IDLE_CONNECTIONS = {}
+POOL_MAXSIZE = 4  # idle connections kept per host; extras are closed
+# Per-run memo of (url, headers) -> Future of (response, body); concurrent
+# callers of the same URL share the one in-flight request
+_REQUESTS = {}
+_REQUESTS_LOCK = threading.Lock()
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_REDIRECTS = 5
 
 WATCHED = {
     "NVDA": "0001045810",
@@ -65,22 +103,284 @@ POLY_SKIP = ["nba", "nfl", "premier league", "champions league", "fifa",
              "polymarket", "puffpaw", "backpack", "metamask",
              "edgex", "hottest year", "weather"]
 
+# Tech/AI Form D filers, matched against each hit's names and description
+FORM_D_AI_RE = re.compile(r"technology|software|artificial intelligence|machine learning", re.I)
+
+# Short labels for known event types, in priority order. Every alternative
+# is a lookahead anchored at the start, so LABEL_RE tries them in this order
+# (first rule wins, not leftmost match) and "contains both" ignores word order.
+LABEL_RULES = [
+    ("FedCut", r"(?=.*(?:fed|fomc))(?=.*(?:rate|cut|decrease|interest))"),
+    ("FedChr", r"(?=.*fed chair)|(?=.*nominate)(?=.*fed)"),
+    ("Recsn",  r"(?=.*recession)"),
+    ("SCTarf", r"(?=.*tariff)(?=.*supreme)"),
+    ("TarRev", r"(?=.*tariff)(?=.*revenue)"),
+    ("Tarif",  r"(?=.*tariff)"),
+    ("Infln",  r"(?=.*inflation)"),
+    ("BestAI", r"(?=.*(?:ai model|best ai))"),
+    ("BigCo",  r"(?=.*largest company)"),
+    ("IPOs",   r"(?=.*ipo)"),
+    ("Shtdwn", r"(?=.*shutdown)"),
+    ("Tax",    r"(?=.*tax)"),
+    ("Midtrm", r"(?=.*midterm)"),
+    ("GDP",    r"(?=.*gdp)"),
+    ("SP500",  r"(?=.*(?:s&p|sp500))"),
+]
+LABEL_RE = re.compile("^(?:" + "|".join(f"(?P<{lbl}>{pat})" for lbl, pat in LABEL_RULES) + ")", re.S)
+
+
+def json_bytes(obj):
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _send(netloc, method, path, body, headers, timeout):
+    """One request over a pooled keep-alive connection; returns (response, body)."""
+    idle = _IDLE_CONNECTIONS.setdefault(netloc, [])
+    for attempt in range(2):
+        try:
+            conn = idle.pop()
+        except IndexError:
+            conn = http.client.HTTPSConnection(netloc, timeout=timeout)
+        # A pooled connection whose socket was dropped reconnects with
+        # conn.timeout, so keep it at this call's value too
+        conn.timeout = timeout
+        reused = conn.sock is not None
+        if reused:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+            break
+        except (http.client.HTTPException, ConnectionError):
+            # Server closed the idle keep-alive socket — reconnect once
+            conn.close()
+            if not reused or attempt:
+                raise
+    if len(idle) < POOL_MAXSIZE:
+        idle.append(conn)
+    else:
+        conn.close()
+    return resp, data
+
+
+def _retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
 
-def fetch(url, headers=None, timeout=15):
-    h = headers or {"User-Agent": "Mozilla/5.0"}
-    req = urllib.request.Request(url, headers=h)
-    with urllib.request.urlopen(req, timeout=timeout) as r:
-        return json.loads(r.read())
+
+def _request(url, headers, timeout=15, attempts=4, redirects=MAX_REDIRECTS):
+    """GET with retries and redirects; returns (response, body), raises HTTPError on failure.
+
+    Asks for a compressed body and returns it decompressed. Follows at most
+    `redirects` more hops, so a redirect loop fails instead of recursing.
+    """
+    headers = {"Accept-Encoding": "gzip, deflate", **headers}
+    parts = urllib.parse.urlsplit(url)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    for attempt in range(attempts):
+        resp, data = _send(parts.netloc, "GET", path, None, headers, timeout)
+        if resp.status not in RETRY_STATUSES or attempt == attempts - 1:
+            break
+        # Rate limited / upstream hiccup — honor Retry-After, else backoff + jitter
+        wait = _retry_after(resp.headers.get("Retry-After"))
+        if wait is None:
+            wait = 2 ** attempt + random.uniform(0, 0.5)
+        time.sleep(min(wait, 30))
+    if resp.status in (301, 302, 303, 307, 308) and resp.headers.get("Location"):
+        if not redirects:
+            raise urllib.error.HTTPError(url, resp.status, "Too many redirects", resp.headers, None)
+        return _request(urllib.parse.urljoin(url, resp.headers["Location"]), headers, timeout,
+                        attempts, redirects - 1)
+    if not 200 <= resp.status < 300 and resp.status != 304:
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+    encoding = resp.headers.get("Content-Encoding", "").lower() if data else ""
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    elif encoding == "deflate":
+        # zlib-wrapped per the spec, but some servers send raw deflate
+        try:
+            data = zlib.decompress(data)
+        except zlib.error:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+    return resp, data
+
+
+def _get(url, hdr_key, timeout=15):
+    """_request(), memoized per run so repeated or concurrent URLs cost one request."""
+    key = (url, hdr_key)
+    with _REQUESTS_LOCK:
+        fut = _REQUESTS.get(key)
+        owner = fut is None
+        if owner:
+            fut = _REQUESTS[key] = Future()
+    if not owner:
+        return fut.result()
+    try:
+        result = _request(url, dict(hdr_key), timeout)
+    except BaseException as e:
+        # Failures aren't memoized — a later call gets a fresh attempt
+        with _REQUESTS_LOCK:
+            del _REQUESTS[key]
+        fut.set_exception(e)
+        raise
+    fut.set_result(result)
+    return result
+
+
+def fetch_cached(url, headers=None, ttl=3600):
+    """Fetch JSON through a disk cache keyed by URL hash; serves stale on fetch error.
+
+    Expired entries are revalidated with If-None-Match / If-Modified-Since,
+    so an unchanged resource comes back as an empty 304.
+    """
+    path = os.path.join(CACHE_DIR, hashlib.md5(url.encode()).hexdigest() + ".json")
+    cached = None
+    try:
+        with open(path, "rb") as f:
+            cached = json_loads(f.read())
+        if time.time() - cached["ts"] < ttl:
+            return cached["body"]
+    except (OSError, ValueError, KeyError, TypeError):
+        cached = None
+    h = dict(headers or {"User-Agent": "Mozilla/5.0"})
+    if cached is not None:
+        if cached.get("etag"):
+            h["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            h["If-Modified-Since"] = cached["last_modified"]
+    try:
+        resp, data = _get(url, tuple(sorted(h.items())))
+        if resp.status == 304 and cached is not None:
+            body = cached["body"]
+        else:
+            body = json_loads(data)
+    except Exception:
+        if cached is not None:
+            return cached["body"]
+        raise
+    entry = {"ts": time.time(),
+             "etag": resp.headers.get("ETag") or (cached or {}).get("etag"),
+             "last_modified": resp.headers.get("Last-Modified") or (cached or {}).get("last_modified"),
+             "body": body}
+    # Write-then-rename so a concurrent reader never sees a half-written file;
+    # the temp name is per thread since builders write the cache concurrently
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(json_bytes(entry))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return body
+
+
+def prune_cache():
+    """Delete cache entries whose stored ts is older than CACHE_MAX_AGE."""
+    cutoff = time.time() - CACHE_MAX_AGE
+    try:
+        entries = list(os.scandir(CACHE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.name.endswith(".json"):
+                with open(entry.path, "rb") as f:
+                    stale = json_loads(f.read())["ts"] < cutoff
+            else:
+                # Leftover temp file from an interrupted write
+                stale = entry.stat().st_mtime < cutoff
+        except (ValueError, KeyError, TypeError):
+            stale = True  # unreadable entry, fetch_cached would ignore it
+        except OSError:
+            continue
+        if stale:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
 
 
 def yahoo(sym, rng="12d"):
-    d = fetch(f"https://query1.finance.yahoo.com/v8/finance/chart/{sym}?range={rng}&interval=1d")
+    d = fetch_cached(f"https://query1.finance.yahoo.com/v8/finance/chart/{sym}?range={rng}&interval=1d",
+                     ttl=TTL_YAHOO)
     r = d["chart"]["result"][0]
     price = r["meta"]["regularMarketPrice"]
     closes = [c for c in r["indicators"]["quote"][0]["close"] if c is not None]
     return price, closes
 
 
+def yahoo_many(syms, rng="12d"):
+    """Fetch yahoo() for several symbols concurrently -> {sym: (price, closes) or exception}."""
+    def one(sym):
+        try:
+            return yahoo(sym, rng)
+        except Exception as e:
+            return e
+    with ThreadPoolExecutor(max_workers=10) as ex:
+        return dict(zip(syms, ex.map(one, syms)))
+
+
+def _spark_quote(d, sym):
+    """Pull (price, closes) for one symbol out of a spark response."""
+    if "spark" in d:
+        # Chart-style shape: {"spark": {"result": [{"symbol", "response": [chart]}]}}
+        r = next(x["response"][0] for x in d["spark"]["result"] if x["symbol"] == sym)
+        closes = [c for c in r["indicators"]["quote"][0]["close"] if c is not None]
+        return r["meta"]["regularMarketPrice"], closes
+    # Compact shape: {sym: {"close": [...], "timestamp": [...]}}; last daily
+    # close is the live price during the session
+    closes = [c for c in d[sym]["close"] if c is not None]
+    return closes[-1], closes
+
+
+def yahoo_spark(syms, rng="12d"):
+    """Batch Yahoo daily closes, 10 symbols per spark request -> {sym: (price, closes)}.
+
+    Symbols the batch call misses fall back to per-symbol chart requests, so
+    the result has the same shape as yahoo_many().
+    """
+    out = {}
+    for i in range(0, len(syms), 10):
+        chunk = syms[i:i + 10]
+        try:
+            d = fetch_cached(f"https://query1.finance.yahoo.com/v8/finance/spark"
+                             f"?symbols={urllib.parse.quote(','.join(chunk), safe=',')}"
+                             f"&range={rng}&interval=1d", ttl=TTL_YAHOO)
+        except Exception:
+            continue
+        for sym in chunk:
+            try:
+                out[sym] = _spark_quote(d, sym)
+            except (KeyError, IndexError, TypeError, StopIteration):
+                pass
+    missing = [s for s in syms if s not in out]
+    if missing:
+        out.update(yahoo_many(missing, rng))
+    return out
+
+
+def quote(quotes, sym):
+    """Look up a yahoo_spark()/yahoo_many() result, re-raising that symbol's fetch error."""
+    q = quotes[sym]
+    if isinstance(q, Exception):
+        raise q
+    return q
+
+
 # Consistent 3-column layout for all lines
 # Col1: 14 chars, Col2: 13 chars, Col3: rest
 # Total: emoji(2) + space(1) + 14 + "│ "(2) + 13 + "│ "(2) + ~8 = ~42
@@ -107,12 +407,25 @@ def build_line1():
     info = {}
     parts = []
     expl = []
+    # Quotes and both FRED series are independent — fetch them in one wave
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        quotes_f = ex.submit(yahoo_spark, ["^VIX", "^VIX3M", "HYG", "^TNX"])
+        if FRED_KEY:
+            hy_f = ex.submit(fetch_cached,
+                             f"https://api.stlouisfed.org/fred/series/observations"
+                             f"?series_id=BAMLH0A0HYM2&api_key={FRED_KEY}"
+                             f"&file_type=json&sort_order=desc&limit=1", ttl=TTL_HY)
+            m2_f = ex.submit(fetch_cached,
+                             f"https://api.stlouisfed.org/fred/series/observations"
+                             f"?series_id=M2SL&api_key={FRED_KEY}"
+                             f"&file_type=json&sort_order=desc&limit=2", ttl=TTL_M2)
+    quotes = quotes_f.result()
 
     # VIX + term structure
     vix, struct = None, "?"
     try:
-        vix, _ = yahoo("^VIX")
-        vix3m, _ = yahoo("^VIX3M")
+        vix, _ = quote(quotes, "^VIX")
+        vix3m, _ = quote(quotes, "^VIX3M")
         ratio = vix / vix3m
         if ratio < 0.97:
             struct = "cntgo"
@@ -130,32 +443,32 @@ def build_line1():
 
     # Credit proxy — HYG 5d return
     try:
-        _, hc = yahoo("HYG")
+        _, hc = quote(quotes, "HYG")
         hyg_ret = safe_5d(hc)
         if hyg_ret > 0.3:
-            credit = "HY↑"
+            credit, credit_dir = "HY↑", 1
             expl.append("credit tightening")
         elif hyg_ret < -0.5:
-            credit = "HY↓"
+            credit, credit_dir = "HY↓", -1
             expl.append("credit widening")
         else:
-            credit = "HY→"
+            credit, credit_dir = "HY→", 0
             expl.append("credit stable")
         info["credit"] = credit
+        info["credit_dir"] = credit_dir
     except Exception:
         credit = None
 
     # HY OAS from FRED (more precise)
     if FRED_KEY:
         try:
-            d = fetch(f"https://api.stlouisfed.org/fred/series/observations"
-                      f"?series_id=BAMLH0A0HYM2&api_key={FRED_KEY}"
-                      f"&file_type=json&sort_order=desc&limit=1")
+            d = hy_f.result()
             spread = float(d["observations"][0]["value"])
             credit = f"HY{int(spread * 100)}"
             status = "healthy" if spread < 4.0 else "elevated" if spread < 5.5 else "stressed"
             expl[-1] = f"credit {status} ({spread:.1f}%)"
             info["credit"] = credit
+            info["credit_dir"] = 0  # OAS label carries no direction
             info["hy_spread"] = spread
         except Exception:
             pass
@@ -163,22 +476,21 @@ def build_line1():
     # M2 from FRED
     if FRED_KEY:
         try:
-            d = fetch(f"https://api.stlouisfed.org/fred/series/observations"
-                      f"?series_id=M2SL&api_key={FRED_KEY}"
-                      f"&file_type=json&sort_order=desc&limit=2")
+            d = m2_f.result()
             cur = float(d["observations"][0]["value"])
             prev = float(d["observations"][1]["value"])
             g = (cur - prev) / prev * 100
             arrow = "▲" if g > 0 else "▼"
             m2_str = f"M2{arrow}{abs(g):.1f}%"
             info["m2"] = m2_str
+            info["m2_dir"] = 1 if g > 0 else -1
             expl.append("liquidity " + ("expanding" if g > 0 else "contracting"))
         except Exception:
             pass
 
     # 10Y yield
     try:
-        tny, _ = yahoo("^TNX")
+        tny, _ = quote(quotes, "^TNX")
         info["10y"] = tny
     except Exception:
         tny = None
@@ -232,8 +544,9 @@ def build_line1():
 # LINE 2: SECTOR FLOWS
 # ────────────────────────────────────────
 def build_line2():
+    quotes = yahoo_spark(["SPY"] + [s for s, _ in SECTORS])
     try:
-        _, sc = yahoo("SPY")
+        _, sc = quote(quotes, "SPY")
         spy_5d = safe_5d(sc)
     except Exception:
         return "$▶ flow unavail", "💸 market data unavailable", {}
@@ -241,7 +554,7 @@ def build_line2():
     flows = []
     for sym, lbl in SECTORS:
         try:
-            _, c = yahoo(sym)
+            _, c = quote(quotes, sym)
             r = safe_5d(c)
             flows.append((lbl, r - spy_5d, r))
         except Exception:
@@ -291,20 +604,34 @@ def build_line2():
 # ────────────────────────────────────────
 # LINE 3: SEC EDGAR FILINGS
 # ────────────────────────────────────────
-def build_line3():
+def build_line3(today, week_ago):
     edgar_h = {"User-Agent": "MoneyFlowDashboard contact@example.com"}
     insider_parts = []
-    cutoff = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    # One query: total from the hit count, tech/AI tallied from the newest 100
+    # hits. It runs alongside the submissions reads — 5 requests, well under
+    # SEC's 10 req/s limit.
+    form_d_url = (f"https://efts.sec.gov/LATEST/search-index?"
+                  f"forms=D&dateRange=custom&startdt={week_ago}&enddt={today}&from=0&size=100")
+    tickers = list(WATCHED.items())[:4]
+    with ThreadPoolExecutor(max_workers=len(tickers) + 1) as ex:
+        form_d_f = ex.submit(fetch_cached, form_d_url, edgar_h, ttl=TTL_EFTS)
+        subs_f = [ex.submit(fetch_cached, f"https://data.sec.gov/submissions/CIK{cik}.json",
+                            edgar_h, ttl=TTL_SEC)
+                  for _, cik in tickers]
 
     # Form 4: insider filings for watched tickers
-    for ticker, cik in list(WATCHED.items())[:4]:
+    for (ticker, _), f in zip(tickers, subs_f):
         try:
-            d = fetch(f"https://data.sec.gov/submissions/CIK{cik}.json", edgar_h)
-            recent = d["filings"]["recent"]
-            count = sum(
-                1 for i in range(min(30, len(recent["form"])))
-                if recent["form"][i] == "4" and recent["filingDate"][i] >= cutoff
-            )
+            recent = f.result()["filings"]["recent"]
+            forms, dates = recent["form"], recent["filingDate"]
+            # Filings are newest first — stop at the first one older than a week
+            count = 0
+            for i in range(min(30, len(forms))):
+                if dates[i] < week_ago:
+                    break
+                if forms[i] == "4":
+                    count += 1
             if count > 0:
                 insider_parts.append(f"{ticker}:{count}")
         except Exception:
@@ -314,27 +641,24 @@ def build_line3():
 
     # Form D: recent private placements
     form_d_count = 0
+    form_d_sample = 0  # AI count covers only the newest hits, not the whole week
     form_d_total = 0
     try:
-        today = datetime.now().strftime("%Y-%m-%d")
-        week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        # Tech/AI Form D filings
-        q = urllib.parse.quote('"technology" OR "software" OR "artificial intelligence" OR "machine learning"')
-        url = (f"https://efts.sec.gov/LATEST/search-index?q={q}"
-               f"&forms=D&dateRange=custom&startdt={week_ago}&enddt={today}&from=0&size=1")
-        d = fetch(url, edgar_h)
-        form_d_count = d["hits"]["total"]["value"]
-        # Total Form D filings
-        url2 = (f"https://efts.sec.gov/LATEST/search-index?"
-                f"forms=D&dateRange=custom&startdt={week_ago}&enddt={today}&from=0&size=1")
-        d2 = fetch(url2, edgar_h)
-        form_d_total = d2["hits"]["total"]["value"]
+        hits = form_d_f.result()["hits"]
+        form_d_total = hits["total"]["value"]
+        form_d_sample = len(hits["hits"])
+        for h in hits["hits"]:
+            src = h.get("_source", {})
+            text = " ".join([*(src.get("display_names") or []),
+                             src.get("file_description") or "", src.get("description") or ""])
+            if FORM_D_AI_RE.search(text):
+                form_d_count += 1
     except Exception:
         pass
 
     c1 = f"insdr {insider_str}"
-    c2 = f"formD {form_d_count} AI"
-    c3 = f"{form_d_total} total wk"
+    c2 = f"AI {form_d_count}/{form_d_sample} new"
+    c3 = f"{form_d_total} formD wk"
     line = fmt3("📋", c1, c2, c3)
 
     # Rich explanation
@@ -343,7 +667,7 @@ def build_line3():
         ex.append(f"{', '.join(insider_parts)} insider filings (7d)")
     else:
         ex.append("no insider activity in watched tickers")
-    ex.append(f"{form_d_count} tech/AI of {form_d_total} total Form D raises this wk")
+    ex.append(f"{form_d_count} tech/AI in newest {form_d_sample} of {form_d_total} Form D raises this wk")
     explain = "📋 " + " │ ".join(ex)
 
     return line, explain, {}
@@ -352,30 +676,19 @@ def build_line3():
 # ────────────────────────────────────────
 # LINE 4: POLYMARKET
 # ────────────────────────────────────────
-def build_line4():
+def build_line4(today):
     markets = []
-    today = datetime.now().strftime("%Y-%m-%d")
 
     try:
         url = ("https://gamma-api.polymarket.com/events"
                "?limit=200&active=true&closed=false&order=volume&ascending=false")
-        events = fetch(url)
+        events = fetch_cached(url, ttl=TTL_POLY)
     except Exception:
         events = []
 
     for e in events:
         try:
-            title_lower = e.get("title", "").lower()
-            desc_lower = e.get("description", "").lower()
-            search_text = title_lower + " " + desc_lower
-
-            # Skip non-relevant events
-            if any(s in title_lower for s in POLY_SKIP):
-                continue
-            if not any(k in search_text for k in POLY_KEYWORDS):
-                continue
-
-            event_title = e.get("title", "")
+            # Cheapest checks first: no markets / expired, then the keyword scans
             event_markets = e.get("markets", [])
             if not event_markets:
                 continue
@@ -388,16 +701,29 @@ def build_line4():
             if end_date and end_date[:10] < today:
                 continue
 
+            # Skip non-relevant events
+            event_title = e.get("title", "")
+            title_lower = event_title.lower()
+            if any(s in title_lower for s in POLY_SKIP):
+                continue
+            # Most relevant events say so in the title; only lowercase the
+            # (much longer) description when the title alone doesn't match
+            if not any(k in title_lower for k in POLY_KEYWORDS):
+                search_text = title_lower + " " + e.get("description", "").lower()
+                if not any(k in search_text for k in POLY_KEYWORDS):
+                    continue
+
+            # Only the first outcome matters — read it without parsing the array
             prices = m.get("outcomePrices", "[]")
             if isinstance(prices, str):
-                p = json.loads(prices)
+                p0 = prices.strip("[] ").split(",", 1)[0].strip('" ')
             else:
-                p = prices
+                p0 = prices[0] if prices else None
 
-            if not p or not p[0]:
+            if not p0:
                 continue
 
-            prob = float(p[0]) * 100
+            prob = float(p0) * 100
 
             # Skip near-resolved events (not interesting)
             if prob < 10 or prob > 85:
@@ -405,38 +731,10 @@ def build_line4():
 
             # Build short label — pattern match known events first
             raw = event_title.split("?")[0].split("...")[0].strip()
-            rl = raw.lower()
-            if ("fed" in rl or "fomc" in rl) and ("rate" in rl or "cut" in rl or "decrease" in rl or "interest" in rl):
-                short = "FedCut"
-            elif "fed chair" in rl or ("nominate" in rl and "fed" in rl):
-                short = "FedChr"
-            elif "recession" in rl:
-                short = "Recsn"
-            elif "tariff" in rl and "supreme" in rl:
-                short = "SCTarf"
-            elif "tariff" in rl and "revenue" in rl:
-                short = "TarRev"
-            elif "tariff" in rl:
-                short = "Tarif"
-            elif "inflation" in rl:
-                short = "Infln"
-            elif "ai model" in rl or "best ai" in rl:
-                short = "BestAI"
-            elif "largest company" in rl:
-                short = "BigCo"
-            elif "ipo" in rl:
-                short = "IPOs"
-            elif "shutdown" in rl:
-                short = "Shtdwn"
-            elif "tax" in rl:
-                short = "Tax"
-            elif "midterm" in rl:
-                short = "Midtrm"
-            elif "gdp" in rl:
-                short = "GDP"
-            elif "s&p" in rl or "sp500" in rl:
-                short = "SP500"
-            else:
+            rl = title_lower.split("?")[0].split("...")[0].strip()
+            hit = LABEL_RE.match(rl)
+            short = hit.lastgroup if hit else None
+            if short is None:
                 for rm in ["Will ", "the ", "Trump ", "United States ",
                             "How many ", "What will ", "Who will "]:
                     raw = raw.replace(rm, "")
@@ -500,20 +798,19 @@ def build_line5(info):
     elif struct == "bkwrd":
         score -= 2
 
-    # M2
-    m2 = info.get("m2", "")
-    if "▲" in m2:
+    # M2 / credit direction: +1 up, -1 down, 0 flat or unknown
+    m2_dir = info.get("m2_dir", 0)
+    if m2_dir > 0:
         score += 1
         reasons.append("liq▲")
-    elif "▼" in m2:
+    elif m2_dir < 0:
         score -= 1
         reasons.append("liq▼")
 
-    # Credit
-    credit = info.get("credit", "")
-    if "↑" in credit:
+    credit_dir = info.get("credit_dir", 0)
+    if credit_dir > 0:
         score += 1
-    elif "↓" in credit:
+    elif credit_dir < 0:
         score -= 1
         reasons.append("credit↓")
 
@@ -528,16 +825,15 @@ def build_line5(info):
 
     # Top sector flow
     flows = info.get("flows", [])
+    # Check if user's sectors (Semi) are in top flows
+    semi_up = any(lbl == "Semi" and rel > 1 for lbl, rel, _ in flows)
     if flows:
         top_lbl, top_rel, _ = flows[0]
         if top_rel > 2:
             reasons.append(f"{top_lbl.lower()}")
-        # Check if user's sectors (Semi) are in top flows
-        for lbl, rel, _ in flows:
-            if lbl == "Semi" and rel > 1:
-                reasons.append("semi▲")
-                score += 1
-                break
+        if semi_up:
+            reasons.append("semi▲")
+            score += 1
 
     # Signal text
     if score >= 4:
@@ -552,9 +848,9 @@ def build_line5(info):
         signal = "raise cash"
 
     # Add structural reasons too
-    if struct == "cntgo" and "liq▲" not in reasons:
+    if struct == "cntgo" and m2_dir <= 0:
         reasons.append("cntgo")
-    if info.get("credit") and "↑" in info.get("credit", ""):
+    if credit_dir > 0:
         reasons.append("HY ok")
 
     reason_str = " ".join(reasons[:4]) if reasons else "mixed"
@@ -571,13 +867,10 @@ def build_line5(info):
         breakdown.append("cntgo+1")
     elif struct == "bkwrd":
         breakdown.append("bkwrd-2")
-    if "▲" in m2:
+    if m2_dir > 0:
         breakdown.append("M2+1")
-    if flows:
-        for lbl, rel, _ in flows:
-            if lbl == "Semi" and rel > 1:
-                breakdown.append("semi+1")
-                break
+    if semi_up:
+        breakdown.append("semi+1")
     explain = f"💡 score {score:+d}: {' '.join(breakdown)}" if breakdown else f"💡 score {score:+d}"
 
     return line, explain
@@ -587,6 +880,13 @@ def build_line5(info):
 # AGENT: ITERATIVE PROMPT REFINEMENT
 # ────────────────────────────────────────
 AGENT_MODEL = "gpt-5.2"
+PROMPT_CACHE_KEY = "money_flow_v1"  # bump when SYSTEM_PROMPT changes
+_OAI = None  # OpenAI client, created on first use
+# Wall time (seconds) across all refinement attempts; the job runs hourly, so
+# a few minutes is affordable. No attempt starts with less than
+# AGENT_MIN_TIMEOUT left, and none runs past the budget.
+AGENT_TIME_BUDGET = float(os.environ.get("MONEY_AGENT_BUDGET", "300"))
+AGENT_MIN_TIMEOUT = 90  # a full 600-token completion can take over a minute
 
 SYSTEM_PROMPT = """\
 You format financial market data into a pinned GitHub gist dashboard.
@@ -635,35 +935,38 @@ OUTPUT: Only the gist content (5 dashboard lines + blank + explanations). Nothin
 """
 
 
+_ZERO_WIDTH = frozenset(range(0xFE00, 0xFE10)) | {0x200D}  # variation selectors, ZWJ
+_W_CACHE = {}
+
+
+def _char_width(ch):
+    """Visual width of one character; ASCII short-circuits, the rest is memoized."""
+    if ch < "\x80":
+        return 1
+    w = _W_CACHE.get(ch)
+    if w is None:
+        cp = ord(ch)
+        if cp in _ZERO_WIDTH:
+            w = 0
+        elif unicodedata.east_asian_width(ch) in ('W', 'F') or cp > 0x1F000:
+            w = 2
+        elif cp > 0x2600 and unicodedata.category(ch) == 'So':
+            w = 2
+        else:
+            w = 1
+        _W_CACHE[ch] = w
+    return w
+
+
 def visual_width(s):
     """Calculate visual width: emoji=2, box-drawing=1, others=1."""
-    width = 0
-    i = 0
-    chars = list(s)
-    n = len(chars)
-    while i < n:
-        cp = ord(chars[i])
-        # Skip variation selectors and ZWJ (they don't add width)
-        if 0xFE00 <= cp <= 0xFE0F or cp == 0x200D:
-            i += 1
-            continue
-        # Emoji: check East Asian Width + common emoji ranges
-        cat = unicodedata.category(chars[i])
-        eaw = unicodedata.east_asian_width(chars[i])
-        if eaw in ('W', 'F'):
-            width += 2
-        elif cp > 0x1F000:
-            width += 2
-        elif cat == 'So' and cp > 0x2600:
-            width += 2
-        else:
-            width += 1
-        i += 1
-    return width
+    if s.isascii():
+        return len(s)
+    return sum(map(_char_width, s))
 
 
 def validate_gist_output(output):
-    """Validate gist formatting constraints. Returns list of errors (empty = valid)."""
+    """Validate gist formatting constraints. Returns (errors, dashboard line widths); no errors = valid."""
     errors = []
     lines = output.split("\n")
 
@@ -679,10 +982,10 @@ def validate_gist_output(output):
     if len(dashboard) != 5:
         errors.append(f"Expected 5 dashboard lines, got {len(dashboard)}")
 
-    for i, line in enumerate(dashboard):
-        w = visual_width(line)
+    widths = [visual_width(line) for line in dashboard]
+    for i, (line, w) in enumerate(zip(dashboard, widths)):
         if w > 43:
-            errors.append(f"Line {i+1} is {w} chars wide (max 43): '{line}'")
+            errors.append(f"Line {i+1} is {w}/43 chars wide — trim {w-43}: '{line}'")
         elif w < 39:
             errors.append(f"Line {i+1} is only {w}/43 chars. You have {43-w} more chars to fill — add more data or context.")
 
@@ -696,7 +999,7 @@ def validate_gist_output(output):
     if blank_idx is None:
         errors.append("Missing blank line between dashboard and explanations")
 
-    return errors
+    return errors, widths
 
 
 def agent_refine(raw_lines, raw_explains, info):
@@ -705,12 +1008,20 @@ def agent_refine(raw_lines, raw_explains, info):
     if not api_key:
         return None
 
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
-    except ImportError:
-        print("⚠ openai SDK not installed, using deterministic output")
-        return None
+    global _OAI
+    if _OAI is None:
+        try:
+            from openai import OpenAI
+            # The loop below owns retries; SDK retries would stack on top of it
+            _OAI = OpenAI(api_key=api_key, max_retries=0)
+        except ImportError:
+            print("⚠ openai SDK not installed, using deterministic output")
+            return None
+    client = _OAI
+    import openai
+    # Transient failures worth another attempt; anything else (auth, bad
+    # request, unknown model) won't improve on retry
+    retryable = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
 
     # Build data context for the model
     data_context = json.dumps({
@@ -745,13 +1056,21 @@ Rewrite this dashboard. Rules:
         {"role": "user", "content": user_prompt},
     ]
 
+    deadline = time.monotonic() + AGENT_TIME_BUDGET
     for attempt in range(5):
+        remaining = deadline - time.monotonic()
+        if remaining < AGENT_MIN_TIMEOUT:
+            print("⚠ Agent time budget exhausted, using deterministic output")
+            return None
         try:
             resp = client.chat.completions.create(
                 model=AGENT_MODEL,
                 messages=messages,
                 temperature=0.7,
                 max_completion_tokens=600,
+                # Routes every attempt to the same prompt cache for SYSTEM_PROMPT
+                extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+                timeout=remaining,
             )
             output = resp.choices[0].message.content.strip()
             # Strip markdown code fences if the model wraps output
@@ -761,16 +1080,8 @@ Rewrite this dashboard. Rules:
                 output = "\n".join(output.split("\n")[:-1])
             output = output.strip()
 
-            errors = validate_gist_output(output)
-
-            # Always compute widths for feedback
-            dash_lines = []
-            for ln in output.split("\n"):
-                if ln.strip() == "":
-                    break
-                dash_lines.append(ln)
-            widths = [f"  L{i+1}: {visual_width(l)}/43 chars" for i, l in enumerate(dash_lines)]
-            width_report = "\n".join(widths)
+            errors, widths = validate_gist_output(output)
+            width_report = "\n".join(f"  L{i+1}: {w}/43 chars" for i, w in enumerate(widths))
 
             if not errors:
                 print(f"✓ Agent produced valid output on attempt {attempt + 1}")
@@ -789,11 +1100,14 @@ Rewrite this dashboard. Rules:
                 "Output ONLY the corrected gist content."
             )})
 
+        except retryable as e:
+            print(f"  Agent attempt {attempt + 1} error (retrying): {e}")
+            time.sleep(min(2 ** attempt + random.random(), max(0, deadline - time.monotonic())))
         except Exception as e:
             print(f"  Agent attempt {attempt + 1} error: {e}")
             break
 
-    print("⚠ Agent failed after 5 attempts, using deterministic output")
+    print(f"⚠ Agent failed after {attempt + 1} attempt(s), using deterministic output")
     return None
 
 
@@ -805,18 +1119,23 @@ def update_gist(content):
         print("⚠ No MONEY_GIST_ID set")
         return False
 
+    body = json_bytes({"files": {FILENAME: {"content": content}}})
+    headers = {
+        "Authorization": f"token {os.environ.get('GH_TOKEN', '')}",
+        "Accept": "application/vnd.github+json",
+        "Content-Type": "application/json",
+        "User-Agent": "money-flow/1.0",
+    }
     for attempt in range(3):
         try:
-            subprocess.run(
-                ["gh", "api", "--method", "PATCH", f"/gists/{GIST_ID}",
-                 "-f", f"files[{FILENAME}][content]={content}"],
-                check=True, capture_output=True
-            )
-            return True
-        except subprocess.CalledProcessError:
-            if attempt < 2:
-                import time
-                time.sleep(2)
+            resp, _ = _send("api.github.com", "PATCH", f"/gists/{GIST_ID}", body, headers, 15)
+            if 200 <= resp.status < 300:
+                return True
+            print(f"  gist PATCH attempt {attempt + 1}: HTTP {resp.status}")
+        except (OSError, http.client.HTTPException) as e:
+            print(f"  gist PATCH attempt {attempt + 1}: {e}")
+        if attempt < 2:
+            time.sleep(2 ** attempt)
     return False
 
 
@@ -825,10 +1144,21 @@ def main():
     explains = []
     info = {}
 
-    builders = [build_line1, build_line2, build_line3, build_line4]
-    for builder in builders:
+    # One clock read so every line agrees on the date window
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    week_ago = (now - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    prune_cache()
+
+    # Builders share no state — run them concurrently, then merge in order
+    builders = [(build_line1, ()), (build_line2, ()),
+                (build_line3, (today, week_ago)), (build_line4, (today,))]
+    with ThreadPoolExecutor(max_workers=len(builders)) as ex:
+        futures = [ex.submit(builder, *args) for builder, args in builders]
+    for (builder, _), future in zip(builders, futures):
         try:
-            line, explain, data = builder()
+            line, explain, data = future.result()
             lines.append(line)
             explains.append(explain)
             info.update(data)
@@ -849,15 +1179,16 @@ def main():
     agent_output = agent_refine(lines, explains, info)
 
     if agent_output:
-        content = agent_output
+        body = [agent_output]
         source = "agent"
     else:
-        content = "\n".join(lines) + "\n\n" + "\n".join(explains)
+        body = [*lines, "", *explains]
         source = "deterministic"
 
     # Timestamp
-    now = datetime.now(PT)
-    content += f"\n\n⏱ {now.strftime('%b %d %I:%M%p PT')} [{source}]"
+    now_pt = now.astimezone(PT)  # same clock read as the builders' date window
+    ts = f"⏱ {now_pt.strftime('%b %d %I:%M%p PT')} [{source}]"
+    content = "\n".join([*body, "", ts])
 
     print(content)
 